@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Shared Binance client cache for the order bots
+Bots built with the same credentials reuse one AsyncClient, its pooled HTTP session
+and the order rate limiter guarding it
+"""
+
+import asyncio
+import hashlib
+import hmac
+import time
+import weakref
+
+TESTNET_FUTURES_URL = 'https://testnet.binancefuture.com'
+# Sustained order request rate per client, kept under Binance's 10 orders/sec ceiling
+RATE_LIMIT_ORDERS_PER_SEC = 10
+# Request weight of one /fapi/v1/batchOrders call against the order bucket
+BATCH_ORDER_WEIGHT = 5
+
+# (api_key, testnet) -> task creating (or holding) the shared AsyncClient
+_CLIENT_CACHE = {}
+
+async def _create_client(api_key, api_secret, testnet):
+    # Imported here so --help and bad CLI args never pay for loading binance
+    from binance import AsyncClient
+    client = await AsyncClient.create(api_key, api_secret, testnet=testnet)
+    if testnet:
+        client.FUTURES_URL = TESTNET_FUTURES_URL
+    _install_fast_signer(client)
+    return client
+
+def _install_fast_signer(client):
+    """Sign requests from a keyed HMAC prototype instead of re-keying on every call"""
+    # Only patch the python-binance signing hook we know about, and only for HMAC keys
+    if not hasattr(client, '_hmac_signature') or not client.API_SECRET:
+        return
+    proto = hmac.new(client.API_SECRET.encode('utf-8'), digestmod=hashlib.sha256)
+
+    def _hmac_signature(query_string):
+        # copy() clones the already-keyed inner/outer SHA-256 states
+        m = proto.copy()
+        m.update(query_string.encode('utf-8'))
+        return m.hexdigest()
+
+    client._hmac_signature = _hmac_signature
+
+async def get_client(api_key, api_secret, testnet=True):
+    """Return the shared AsyncClient for these credentials, creating it on first use"""
+    key = (api_key, testnet)
+    task = _CLIENT_CACHE.get(key)
+    if task is None:
+        # Cache the creation task so concurrent first calls share one client
+        task = asyncio.ensure_future(_create_client(api_key, api_secret, testnet))
+        _CLIENT_CACHE[key] = task
+    try:
+        return await asyncio.shield(task)
+    except Exception:
+        if _CLIENT_CACHE.get(key) is task:
+            del _CLIENT_CACHE[key]
+        raise
+
+# client -> async callbacks releasing per-client state (cached bots, streams);
+# callbacks usually reference their client, so entries live until close_clients()
+_CLOSE_HOOKS = {}
+
+def on_close(client, callback):
+    """Have close_clients() await callback() before it closes client"""
+    _CLOSE_HOOKS.setdefault(client, []).append(callback)
+
+async def close_clients():
+    """Close every shared client; call once when the process is done trading"""
+    # Hooks run for every client, including caller-built ones passed to the bots
+    hooks = [callback for callbacks in _CLOSE_HOOKS.values() for callback in callbacks]
+    _CLOSE_HOOKS.clear()
+    for callback in hooks:
+        await callback()
+    
+    tasks = list(_CLIENT_CACHE.values())
+    _CLIENT_CACHE.clear()
+    for task in tasks:
+        if task.done() and not task.cancelled() and task.exception() is None:
+            await task.result().close_connection()
+
+class TokenBucket:
+    """Async token bucket; callers over the rate sleep instead of getting 418/429 bans"""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+
+    async def acquire(self, tokens=1):
+        """Wait until tokens are available, then take them"""
+        while True:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return
+            await asyncio.sleep((tokens - self._tokens) / self.rate)
+
+# client -> TokenBucket; every bot sharing a client also shares its rate budget
+_BUCKETS = weakref.WeakKeyDictionary()
+
+def order_limiter(client):
+    """Return the order rate limiter for client"""
+    bucket = _BUCKETS.get(client)
+    if bucket is None:
+        bucket = _BUCKETS[client] = TokenBucket(RATE_LIMIT_ORDERS_PER_SEC, RATE_LIMIT_ORDERS_PER_SEC)
+    return bucket
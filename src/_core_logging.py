@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+"""
+Shared logging setup for the limit and market order bots
+Configures the root logger once per process and writes bot.log from a background thread
+Named apart from advanced/_logging so neither shadows the other on sys.path
+"""
+
+import atexit
+import logging
+import logging.handlers
+import queue
+
+LOG_FILE = 'bot.log'
+LOG_FORMAT = '%(asctime)s | %(levelname)s | %(module)s | %(message)s'
+
+_listener = None
+
+def configure_logging(level=logging.INFO):
+    """Attach console and bot.log handlers to the root logger if not already configured"""
+    global _listener
+
+    root = logging.getLogger()
+    if root.handlers:
+        return
+
+    formatter = logging.Formatter(LOG_FORMAT)
+
+    # Console output stays synchronous so it interleaves correctly with print()
+    console_handler = logging.StreamHandler()
+    console_handler.setFormatter(formatter)
+
+    # File writes go through a queue so disk I/O never blocks order placement
+    file_handler = logging.FileHandler(LOG_FILE)
+    file_handler.setFormatter(formatter)
+    log_queue = queue.SimpleQueue()
+    _listener = logging.handlers.QueueListener(log_queue, file_handler)
+    _listener.start()
+    atexit.register(_listener.stop)
+
+    root.setLevel(level)
+    root.addHandler(console_handler)
+    root.addHandler(logging.handlers.QueueHandler(log_queue))
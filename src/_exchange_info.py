@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Exchange Info Cache for Binance Futures Trading Bot
+Per-symbol tick size, lot size and min notional filters, fetched once and kept on disk
+"""
+
+import os
+import time
+import logging
+from decimal import Decimal
+import orjson
+
+logger = logging.getLogger('ExchangeInfo')
+
+CACHE_DIR = '.cache'
+# Testnet and mainnet list different symbols and filters, so each gets its own file
+CACHE_FILE = os.path.join(CACHE_DIR, 'exchange_info_{env}.json')
+# Symbol filters rarely change, so a day-old copy is still good for validation
+CACHE_TTL_SECS = 24 * 60 * 60
+
+# env ('testnet' or 'mainnet') -> symbol -> {'tickSize', 'stepSize', 'minQty',
+# 'minNotional'} as Decimals, plus 'priceFormat', the format spec printing a
+# price at tick precision
+_filters = {}
+
+def _parse_filters(exchange_info):
+    """Pick the filters the bots validate against out of a futures_exchange_info() reply"""
+    filters = {}
+    for symbol_info in exchange_info['symbols']:
+        by_type = {f['filterType']: f for f in symbol_info['filters']}
+        filters[symbol_info['symbol']] = {
+            'tickSize': by_type['PRICE_FILTER']['tickSize'],
+            'stepSize': by_type['LOT_SIZE']['stepSize'],
+            'minQty': by_type['LOT_SIZE']['minQty'],
+            # Futures name the min notional field 'notional' rather than 'minNotional'
+            'minNotional': by_type.get('MIN_NOTIONAL', {}).get('notional', '0')
+        }
+    return filters
+
+def _env(client):
+    return 'testnet' if getattr(client, 'testnet', False) else 'mainnet'
+
+def _read_cache(env):
+    path = CACHE_FILE.format(env=env)
+    try:
+        if time.time() - os.path.getmtime(path) < CACHE_TTL_SECS:
+            with open(path, 'rb') as f:
+                return orjson.loads(f.read())
+    except (OSError, orjson.JSONDecodeError):
+        pass
+    return None
+
+def _write_cache(env, filters):
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        with open(CACHE_FILE.format(env=env), 'wb') as f:
+            f.write(orjson.dumps(filters))
+    except OSError as e:
+        logger.warning("Could not write exchange info cache: %s", e)
+
+async def load_filters(client):
+    """Return per-symbol filters for the client's environment, from a fresh disk cache or the API"""
+    env = _env(client)
+    if env in _filters:
+        return _filters[env]
+
+    raw = _read_cache(env)
+    if raw is None:
+        try:
+            raw = _parse_filters(await client.futures_exchange_info())
+        except Exception as e:
+            # Validation falls back to the basic checks rather than blocking trading
+            logger.warning("Could not load exchange info, skipping symbol filter checks: %s", e)
+            return {}
+        _write_cache(env, raw)
+
+    filters = {}
+    for symbol, symbol_filters in raw.items():
+        parsed = {name: Decimal(value) for name, value in symbol_filters.items()}
+        decimals = max(0, -parsed['tickSize'].normalize().as_tuple().exponent)
+        parsed['priceFormat'] = f'.{decimals}f'
+        filters[symbol] = parsed
+    _filters[env] = filters
+    return filters
+
+def to_ticks(filters, price):
+    """Express a price as a whole number of ticks"""
+    # str() first: float repr round-trips API price strings exactly
+    return int(Decimal(str(price)) / filters['tickSize'])
+
+def format_ticks(filters, ticks):
+    """Render a tick count as the price string the API expects"""
+    return format(ticks * filters['tickSize'], filters['priceFormat'])
+
+def check_filters(filters, quantity, price=None):
+    """Check an order against its symbol's filters; raises ValueError on a violation"""
+    quantity = Decimal(str(quantity))
+    if quantity < filters['minQty']:
+        raise ValueError(f"Quantity must be at least {filters['minQty']}")
+    if quantity % filters['stepSize']:
+        raise ValueError(f"Quantity must be a multiple of step size {filters['stepSize']}")
+
+    if price is not None:
+        price = Decimal(str(price))
+        if price % filters['tickSize']:
+            raise ValueError(f"Price must be a multiple of tick size {filters['tickSize']}")
+        if price * quantity < filters['minNotional']:
+            raise ValueError(f"Order notional must be at least {filters['minNotional']}")
@@ -0,0 +1,21 @@
+#!/usr/bin/env python3
+"""
+Event loop runner shared by the async strategy CLIs
+Runs on uvloop when it is installed, otherwise on the default asyncio loop
+"""
+
+import asyncio
+
+def run(coro):
+    """Run a coroutine to completion, preferring the uvloop event loop"""
+    try:
+        import uvloop
+    except ImportError:  # optional: faster socket wakeups for websocket-heavy runs
+        return asyncio.run(coro)
+
+    if hasattr(asyncio, 'Runner'):  # Python 3.11+
+        with asyncio.Runner(loop_factory=uvloop.new_event_loop) as runner:
+            return runner.run(coro)
+
+    uvloop.install()
+    return asyncio.run(coro)
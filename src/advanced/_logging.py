@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Shared logging setup for the advanced strategy modules
+Configures the root logger once per process and writes bot.log from a background thread
+"""
+
+import atexit
+import logging
+import logging.handlers
+import queue
+import orjson
+
+LOG_FILE = 'bot.log'
+LOG_FORMAT = '%(asctime)s | %(levelname)s | %(module)s | %(message)s'
+
+_listener = None
+
+class JsonFormatter(logging.Formatter):
+    """Format records as one JSON object per line for log ingestion"""
+
+    def format(self, record):
+        entry = {
+            'ts': record.created,
+            'lvl': record.levelname,
+            'module': record.module,
+            'msg': record.getMessage()
+        }
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        return orjson.dumps(entry).decode()
+
+def configure_logging(level=logging.INFO, json_lines=False):
+    """Attach console and bot.log handlers to the root logger if not already configured"""
+    global _listener
+
+    root = logging.getLogger()
+    if root.handlers:
+        return
+
+    formatter = logging.Formatter(LOG_FORMAT)
+
+    # Console output stays synchronous so it interleaves correctly with print()
+    console_handler = logging.StreamHandler()
+    console_handler.setFormatter(formatter)
+
+    # File writes go through a queue so disk I/O never blocks order placement;
+    # json_lines switches only bot.log to JSON, the console stays human-readable
+    file_handler = logging.FileHandler(LOG_FILE)
+    file_handler.setFormatter(JsonFormatter() if json_lines else formatter)
+    log_queue = queue.SimpleQueue()
+    _listener = logging.handlers.QueueListener(log_queue, file_handler)
+    _listener.start()
+    atexit.register(_listener.stop)
+
+    root.setLevel(level)
+    root.addHandler(console_handler)
+    root.addHandler(logging.handlers.QueueHandler(log_queue))
@@ -4,42 +4,145 @@ Market Sentiment Integration Module
 Integrates Fear & Greed Index for enhanced trading decisions
 """
 
+import bisect
+import mmap
+import os
 import sys
-import requests
-import json
+from collections import deque
+import orjson
 from datetime import datetime
+from _logging import configure_logging
 import logging
 
-# Configure structured logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s | %(levelname)s | %(module)s | %(message)s',
-    handlers=[
-        logging.FileHandler('bot.log'),
-        logging.StreamHandler()
-    ]
-)
+try:
+    import ijson
+except ImportError:  # optional: only needed to stream very large history files
+    ijson = None
+
+try:
+    import msgpack
+except ImportError:  # optional: binary cache that skips JSON parsing on reload
+    msgpack = None
+
 logger = logging.getLogger('MarketSentiment')
 
+# Files above this size are stream-parsed (when ijson is installed): only the
+# top-level fields are loaded and historical entries stay on disk until needed
+LARGE_FILE_BYTES = 10 * 1024 * 1024
+_SCALAR_EVENTS = ('string', 'number', 'boolean', 'null')
+
+# Sibling file holding a MessagePack copy of a parsed JSON data file
+MSGPACK_SUFFIX = '.msgpack'
+
+# Lower bounds (inclusive) of each Fear & Greed classification band
+_THRESHOLDS = (25, 45, 55, 75)
+_LABELS = ("Extreme Fear", "Fear", "Neutral", "Greed", "Extreme Greed")
+
+# Contrarian recommendation bands: fear bands are inclusive of their upper
+# bound (index <= 20, <= 35), greed bands of their lower bound (>= 65, >= 80)
+_FEAR_CUTOFFS = (20, 35)
+_GREED_CUTOFFS = (65, 80)
+_REC_KEYS = ("EXTREME_FEAR", "FEAR", "NEUTRAL", "GREED", "EXTREME_GREED")
+
+# Recommendation templates; get_trading_recommendation hands out copies
+_RECS = {
+    "EXTREME_FEAR": {
+        "action": "BUY",
+        "reason": "Extreme fear indicates potential buying opportunity",
+        "confidence": "HIGH",
+        "risk_level": "MEDIUM"
+    },
+    "FEAR": {
+        "action": "BUY",
+        "reason": "Fear sentiment suggests market may be oversold",
+        "confidence": "MEDIUM",
+        "risk_level": "MEDIUM"
+    },
+    "NEUTRAL": {
+        "action": "HOLD",
+        "reason": "Neutral sentiment - no clear directional bias",
+        "confidence": "LOW",
+        "risk_level": "LOW"
+    },
+    "GREED": {
+        "action": "SELL",
+        "reason": "Greed sentiment suggests market may be overbought",
+        "confidence": "MEDIUM",
+        "risk_level": "MEDIUM"
+    },
+    "EXTREME_GREED": {
+        "action": "SELL",
+        "reason": "Extreme greed indicates potential market top",
+        "confidence": "HIGH",
+        "risk_level": "MEDIUM"
+    },
+}
+_NO_DATA_REC = {"action": "HOLD", "reason": "No sentiment data available"}
+
 class MarketSentimentAnalyzer:
     def __init__(self):
         """Initialize market sentiment analyzer"""
         self.fear_greed_data = None
+        self._history_file = None
+        self._session = None
         logger.info("Market Sentiment Analyzer initialized")
 
+    def _get_session(self):
+        """Create the pooled HTTP session on first URL load"""
+        if self._session is None:
+            # requests is only needed on the URL path, so import it lazily
+            import requests
+            from requests.adapters import HTTPAdapter
+            from urllib3.util.retry import Retry
+
+            # Reused across URL loads so the TCP/TLS connection stays pooled
+            self._session = requests.Session()
+            self._session.headers.update({'Accept-Encoding': 'gzip'})
+            self._session.mount('https://', HTTPAdapter(
+                pool_connections=4,
+                pool_maxsize=8,
+                max_retries=Retry(total=3, backoff_factor=0.3)
+            ))
+        return self._session
+
+    def close(self):
+        """Release pooled HTTP connections"""
+        if self._session is not None:
+            self._session.close()
+            self._session = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
     def load_fear_greed_data(self, file_path=None, url=None):
         """Load Fear & Greed Index data from file or URL"""
         try:
+            self._history_file = None
             if file_path:
-                # Load from local file
-                with open(file_path, 'r') as f:
-                    self.fear_greed_data = json.load(f)
+                # Load from local file, preferring an up-to-date MessagePack copy
+                cache_path = file_path + MSGPACK_SUFFIX
+                if msgpack and self._cache_is_fresh(file_path, cache_path):
+                    with open(cache_path, 'rb') as f:
+                        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                            self.fear_greed_data = msgpack.unpackb(mm, raw=False)
+                else:
+                    with open(file_path, 'rb') as f:
+                        if ijson and os.fstat(f.fileno()).st_size > LARGE_FILE_BYTES:
+                            self.fear_greed_data = self._load_top_level_fields(f)
+                            self._history_file = file_path
+                        else:
+                            self.fear_greed_data = orjson.loads(f.read())
+                            if msgpack:
+                                self._write_msgpack_cache(cache_path)
                 logger.info(f"Fear & Greed data loaded from file: {file_path}")
             elif url:
                 # Load from URL (if available)
-                response = requests.get(url)
+                response = self._get_session().get(url, timeout=(3, 10))
                 response.raise_for_status()
-                self.fear_greed_data = response.json()
+                self.fear_greed_data = orjson.loads(response.content)
                 logger.info(f"Fear & Greed data loaded from URL: {url}")
             else:
                 # Sample data for demonstration if no source provided
@@ -61,8 +164,43 @@ class MarketSentimentAnalyzer:
             logger.error(f"Failed to load Fear & Greed data: {e}")
             return False
 
-    def get_current_sentiment(self):
-        """Get current market sentiment"""
+    @staticmethod
+    def _cache_is_fresh(source_path, cache_path):
+        """True if cache_path exists and is at least as new as source_path"""
+        try:
+            return os.path.getmtime(cache_path) >= os.path.getmtime(source_path)
+        except OSError:
+            return False
+
+    def _write_msgpack_cache(self, cache_path):
+        """Write the loaded data next to its source file; failures only cost the speedup"""
+        try:
+            tmp_path = cache_path + '.tmp'
+            with open(tmp_path, 'wb') as f:
+                f.write(msgpack.packb(self.fear_greed_data, use_bin_type=True))
+            os.replace(tmp_path, cache_path)
+        except OSError as e:
+            logger.warning(f"Could not write Fear & Greed cache {cache_path}: {e}")
+
+    @staticmethod
+    def _load_top_level_fields(f):
+        """Stream-parse only the scalar top-level fields of a JSON object"""
+        data = {}
+        for prefix, event, value in ijson.parse(f, use_float=True):
+            if prefix and '.' not in prefix and event in _SCALAR_EVENTS:
+                data[prefix] = value
+        return data
+
+    def load_historical_tail(self, file_path, days):
+        """Load only the last `days` historical entries, streaming when ijson is available"""
+        with open(file_path, 'rb') as f:
+            if ijson is None:
+                return orjson.loads(f.read()).get("historical", [])[-days:]
+            # Bounded deque keeps memory at O(days) regardless of history length
+            return list(deque(ijson.items(f, 'historical.item', use_float=True), maxlen=days))
+
+    def get_current_sentiment(self, timestamp=None):
+        """Get current market sentiment, stamped with timestamp (ISO string) or now"""
         if not self.fear_greed_data:
             logger.warning("No Fear & Greed data available")
             return None
@@ -75,21 +213,13 @@ class MarketSentimentAnalyzer:
         return {
             "index": current_index,
             "classification": classification,
-            "timestamp": datetime.now().isoformat()
+            "timestamp": timestamp or datetime.now().isoformat()
         }
 
-    def classify_sentiment(self, index):
+    @staticmethod
+    def classify_sentiment(index):
         """Classify sentiment based on Fear & Greed Index"""
-        if index >= 75:
-            return "Extreme Greed"
-        elif index >= 55:
-            return "Greed"
-        elif index >= 45:
-            return "Neutral"
-        elif index >= 25:
-            return "Fear"
-        else:
-            return "Extreme Fear"
+        return _LABELS[bisect.bisect_right(_THRESHOLDS, index)]
 
     def get_trading_recommendation(self, sentiment_data=None):
         """Get trading recommendation based on sentiment"""
@@ -97,58 +227,30 @@ class MarketSentimentAnalyzer:
             sentiment_data = self.get_current_sentiment()
         
         if not sentiment_data:
-            return {"action": "HOLD", "reason": "No sentiment data available"}
+            return dict(_NO_DATA_REC)
         
         index = sentiment_data["index"]
-        classification = sentiment_data["classification"]
         
         # Contrarian trading strategy based on sentiment
-        if index <= 20:  # Extreme Fear
-            recommendation = {
-                "action": "BUY",
-                "reason": "Extreme fear indicates potential buying opportunity",
-                "confidence": "HIGH",
-                "risk_level": "MEDIUM"
-            }
-        elif index <= 35:  # Fear
-            recommendation = {
-                "action": "BUY",
-                "reason": "Fear sentiment suggests market may be oversold",
-                "confidence": "MEDIUM",
-                "risk_level": "MEDIUM"
-            }
-        elif index >= 80:  # Extreme Greed
-            recommendation = {
-                "action": "SELL",
-                "reason": "Extreme greed indicates potential market top",
-                "confidence": "HIGH",
-                "risk_level": "MEDIUM"
-            }
-        elif index >= 65:  # Greed
-            recommendation = {
-                "action": "SELL",
-                "reason": "Greed sentiment suggests market may be overbought",
-                "confidence": "MEDIUM",
-                "risk_level": "MEDIUM"
-            }
-        else:  # Neutral
-            recommendation = {
-                "action": "HOLD",
-                "reason": "Neutral sentiment - no clear directional bias",
-                "confidence": "LOW",
-                "risk_level": "LOW"
-            }
+        if index <= _FEAR_CUTOFFS[-1]:
+            key = _REC_KEYS[bisect.bisect_left(_FEAR_CUTOFFS, index)]
+        else:
+            key = _REC_KEYS[2 + bisect.bisect_right(_GREED_CUTOFFS, index)]
+        recommendation = dict(_RECS[key])
         
         logger.info(f"Trading recommendation: {recommendation['action']} - {recommendation['reason']}")
         return recommendation
 
     def analyze_historical_trend(self, days=7):
         """Analyze historical sentiment trend"""
-        if not self.fear_greed_data or "historical" not in self.fear_greed_data:
+        if self.fear_greed_data and self._history_file:
+            # Large files leave their history on disk; stream just the tail
+            historical = self.load_historical_tail(self._history_file, days)
+        elif not self.fear_greed_data or "historical" not in self.fear_greed_data:
             logger.warning("No historical data available")
             return None
-        
-        historical = self.fear_greed_data["historical"][-days:]
+        else:
+            historical = self.fear_greed_data["historical"][-days:]
         
         if len(historical) < 2:
             return None
@@ -173,12 +275,13 @@ class MarketSentimentAnalyzer:
 
     def generate_sentiment_report(self):
         """Generate comprehensive sentiment analysis report"""
-        current = self.get_current_sentiment()
+        now_iso = datetime.now().isoformat()
+        current = self.get_current_sentiment(now_iso)
         recommendation = self.get_trading_recommendation(current)
         trend = self.analyze_historical_trend()
         
         report = {
-            "timestamp": datetime.now().isoformat(),
+            "timestamp": now_iso,
             "current_sentiment": current,
             "trading_recommendation": recommendation,
             "trend_analysis": trend,
@@ -204,52 +307,53 @@ def main():
     parser.add_argument('--recommendation', action='store_true', help='Get trading recommendation')
     
     args = parser.parse_args()
+    configure_logging()
     
     try:
         # Initialize analyzer
-        analyzer = MarketSentimentAnalyzer()
-        
-        # Load data
-        if not analyzer.load_fear_greed_data(args.data_file, args.data_url):
-            print("❌ Failed to load sentiment data")
-            sys.exit(1)
-        
-        if args.report:
-            # Generate full report
-            report = analyzer.generate_sentiment_report()
-            print("\n📊 Market Sentiment Analysis Report")
-            print("=" * 50)
+        with MarketSentimentAnalyzer() as analyzer:
             
-            if report["current_sentiment"]:
-                print(f"Current Index: {report['current_sentiment']['index']}")
-                print(f"Classification: {report['current_sentiment']['classification']}")
+            # Load data
+            if not analyzer.load_fear_greed_data(args.data_file, args.data_url):
+                print("❌ Failed to load sentiment data")
+                sys.exit(1)
             
-            print(f"\n🎯 Trading Recommendation:")
-            print(f"Action: {report['trading_recommendation']['action']}")
-            print(f"Reason: {report['trading_recommendation']['reason']}")
-            print(f"Confidence: {report['trading_recommendation']['confidence']}")
+            if args.report:
+                # Generate full report
+                report = analyzer.generate_sentiment_report()
+                print("\n📊 Market Sentiment Analysis Report")
+                print("=" * 50)
+                
+                if report["current_sentiment"]:
+                    print(f"Current Index: {report['current_sentiment']['index']}")
+                    print(f"Classification: {report['current_sentiment']['classification']}")
+                
+                print(f"\n🎯 Trading Recommendation:")
+                print(f"Action: {report['trading_recommendation']['action']}")
+                print(f"Reason: {report['trading_recommendation']['reason']}")
+                print(f"Confidence: {report['trading_recommendation']['confidence']}")
+                
+                if report["trend_analysis"]:
+                    print(f"\n📈 Trend Analysis:")
+                    print(f"Trend: {report['trend_analysis']['trend']}")
+                    print(f"Change: {report['trend_analysis']['change_percent']:.1f}%")
+            
+            elif args.recommendation:
+                # Get trading recommendation only
+                recommendation = analyzer.get_trading_recommendation()
+                print(f"\n🎯 Trading Recommendation: {recommendation['action']}")
+                print(f"Reason: {recommendation['reason']}")
+                print(f"Confidence: {recommendation['confidence']}")
             
-            if report["trend_analysis"]:
-                print(f"\n📈 Trend Analysis:")
-                print(f"Trend: {report['trend_analysis']['trend']}")
-                print(f"Change: {report['trend_analysis']['change_percent']:.1f}%")
-        
-        elif args.recommendation:
-            # Get trading recommendation only
-            recommendation = analyzer.get_trading_recommendation()
-            print(f"\n🎯 Trading Recommendation: {recommendation['action']}")
-            print(f"Reason: {recommendation['reason']}")
-            print(f"Confidence: {recommendation['confidence']}")
-        
-        else:
-            # Default: show current sentiment
-            sentiment = analyzer.get_current_sentiment()
-            if sentiment:
-                print(f"\n📊 Current Market Sentiment:")
-                print(f"Index: {sentiment['index']}")
-                print(f"Classification: {sentiment['classification']}")
             else:
-                print("❌ No sentiment data available")
+                # Default: show current sentiment
+                sentiment = analyzer.get_current_sentiment()
+                if sentiment:
+                    print(f"\n📊 Current Market Sentiment:")
+                    print(f"Index: {sentiment['index']}")
+                    print(f"Classification: {sentiment['classification']}")
+                else:
+                    print("❌ No sentiment data available")
         
     except KeyboardInterrupt:
         logger.info("Sentiment analysis terminated by user")
@@ -6,36 +6,50 @@ One-Cancels-the-Other orders for simultaneous take-profit and stop-loss
 
 import sys
 import argparse
+import asyncio
 from datetime import datetime
-from binance.client import Client
-from binance.enums import SIDE_BUY, SIDE_SELL, TIME_IN_FORCE_GTC
+from functools import lru_cache
+from ticker_cache import TickerCache
+from _logging import configure_logging
+from _eventloop import run
 import logging
 
-# Configure structured logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s | %(levelname)s | %(module)s | %(message)s',
-    handlers=[
-        logging.FileHandler('bot.log'),
-        logging.StreamHandler()
-    ]
-)
 logger = logging.getLogger('OCOOrders')
 
+# Order statuses after which a leg can no longer fill
+CLOSED_STATUSES = ('CANCELED', 'EXPIRED', 'REJECTED')
+# How long monitor_oco_orders waits for a fill before giving up by default
+MONITOR_TIMEOUT_SECS = 60 * 60
+
 class OCOOrderBot:
-    def __init__(self, api_key, api_secret, testnet=True):
-        """Initialize OCO order bot with Binance client"""
+    def __init__(self, client):
+        """Wrap an already-connected AsyncClient; use OCOOrderBot.create() to build one"""
+        self.client = client
+        self.tickers = TickerCache(client)
+
+    @classmethod
+    async def create(cls, api_key, api_secret, testnet=True):
+        """Initialize OCO order bot with Binance async client"""
+        # Imported here so --help and bad CLI args never pay for loading binance
+        from binance import AsyncClient
         try:
-            self.client = Client(api_key, api_secret, testnet=testnet)
+            client = await AsyncClient.create(api_key, api_secret, testnet=testnet)
             if testnet:
-                self.client.FUTURES_URL = 'https://testnet.binancefuture.com'
+                client.FUTURES_URL = 'https://testnet.binancefuture.com'
             logger.info("OCO Order Bot initialized successfully")
+            return cls(client)
         except Exception as e:
-            logger.error(f"Failed to initialize bot: {e}")
+            logger.error("Failed to initialize bot: %s", e)
             raise
 
-    def validate_oco_inputs(self, symbol, side, quantity, price, stop_price, stop_limit_price):
-        """Validate OCO order inputs with price relationship checks"""
+    async def close(self):
+        """Release the underlying HTTP session"""
+        await self.client.close_connection()
+
+    @staticmethod
+    @lru_cache(maxsize=256)
+    def _validate_oco_params(symbol, side, quantity, price, stop_price, stop_limit_price):
+        """Check OCO parameters without any I/O; raises ValueError on bad input"""
         if not symbol or len(symbol) < 6:
             raise ValueError("Invalid symbol format")
         
@@ -59,109 +73,204 @@ class OCOOrderBot:
                 raise ValueError("For BUY OCO: limit price must be lower than stop price")
             if stop_limit_price <= stop_price:
                 raise ValueError("For BUY OCO: stop limit price must be higher than stop price")
-        
-        # Get current market price for validation
-        try:
-            ticker = self.client.futures_symbol_ticker(symbol=symbol)
-            current_price = float(ticker['price'])
-            logger.info(f"Current market price for {symbol}: {current_price}")
-            logger.info(f"OCO prices - Limit: {price}, Stop: {stop_price}, Stop Limit: {stop_limit_price}")
-        except Exception as e:
-            logger.warning(f"Could not fetch current price for validation: {e}")
-        
-        logger.info(f"OCO validation passed: {symbol} {side} {quantity}")
+
+    def validate_oco_inputs(self, symbol, side, quantity, price, stop_price, stop_limit_price):
+        """Validate OCO order inputs with price relationship checks"""
+        self._validate_oco_params(symbol, side, quantity, price, stop_price, stop_limit_price)
+        logger.info("OCO validation passed: %s %s %s", symbol, side, quantity)
         return True
 
-    def place_oco_order(self, symbol, side, quantity, price, stop_price, stop_limit_price):
+    async def sanity_check_against_market(self, symbol, side, price, stop_price, stop_limit_price):
+        """Warn if either OCO leg would trigger immediately at the current market price"""
+        current_price = await self.tickers.get(symbol)
+        logger.info("Current market price for %s: %s", symbol, current_price)
+        logger.info("OCO prices - Limit: %s, Stop: %s, Stop Limit: %s", price, stop_price, stop_limit_price)
+        
+        if side == 'SELL':
+            sane = stop_price < current_price < price
+        else:  # BUY
+            sane = price < current_price < stop_price
+        if not sane:
+            logger.warning("Market price %s is outside the OCO range; one leg may trigger immediately", current_price)
+        return sane
+
+    async def place_oco_order(self, symbol, side, quantity, price, stop_price, stop_limit_price, check_market=True):
         """Place an OCO order with validation and logging"""
         try:
             # Validate inputs
             self.validate_oco_inputs(symbol, side, quantity, price, stop_price, stop_limit_price)
             
             # Log order attempt
-            logger.info(f"Attempting OCO order: {side} {quantity} {symbol}")
-            logger.info(f"Limit: {price}, Stop: {stop_price}, Stop Limit: {stop_limit_price}")
+            logger.info("Attempting OCO order: %s %s %s", side, quantity, symbol)
+            logger.info("Limit: %s, Stop: %s, Stop Limit: %s", price, stop_price, stop_limit_price)
             
             # Note: Binance Futures doesn't support OCO orders directly
-            # We'll simulate by placing both orders and managing them
-            orders = []
-            
-            # Place limit order (take profit)
-            limit_order = self.client.futures_create_order(
+            # We'll simulate by placing both orders and managing them.
+            # Both legs (and the optional market sanity check) go out concurrently
+            # so the window where only one leg is live is a single round-trip
+            limit_coro = self.client.futures_create_order(
                 symbol=symbol,
-                side=SIDE_BUY if side == 'BUY' else SIDE_SELL,
+                side=side,
                 type='LIMIT',
-                timeInForce=TIME_IN_FORCE_GTC,
+                timeInForce='GTC',
                 quantity=quantity,
                 price=price
             )
-            orders.append(limit_order)
-            logger.info(f"Take profit order placed: {limit_order.get('orderId')}")
-            
-            # Place stop limit order (stop loss)
-            stop_order = self.client.futures_create_order(
+            stop_coro = self.client.futures_create_order(
                 symbol=symbol,
-                side=SIDE_BUY if side == 'BUY' else SIDE_SELL,
+                side=side,
                 type='STOP',
-                timeInForce=TIME_IN_FORCE_GTC,
+                timeInForce='GTC',
                 quantity=quantity,
                 price=stop_limit_price,
                 stopPrice=stop_price
             )
-            orders.append(stop_order)
-            logger.info(f"Stop loss order placed: {stop_order.get('orderId')}")
+            coros = [limit_coro, stop_coro]
+            if check_market:
+                coros.append(self.sanity_check_against_market(symbol, side, price, stop_price, stop_limit_price))
+            
+            limit_order, stop_order, *market_check = await asyncio.gather(*coros, return_exceptions=True)
+            
+            if market_check and isinstance(market_check[0], Exception):
+                logger.warning("Could not fetch current price for validation: %s", market_check[0])
+            
+            limit_failed = isinstance(limit_order, Exception)
+            stop_failed = isinstance(stop_order, Exception)
+            if limit_failed or stop_failed:
+                # Never leave a single leg live without its sibling
+                if not limit_failed:
+                    await self._cancel_leg(symbol, limit_order.get('orderId'))
+                if not stop_failed:
+                    await self._cancel_leg(symbol, stop_order.get('orderId'))
+                raise limit_order if limit_failed else stop_order
+            
+            logger.info("Take profit order placed: %s", limit_order.get('orderId'))
+            logger.info("Stop loss order placed: %s", stop_order.get('orderId'))
             
             # Log successful execution
-            logger.info(f"OCO order pair created successfully")
+            logger.info("OCO order pair created successfully")
             
             return {
                 'orderListId': f"OCO_{limit_order.get('orderId')}_{stop_order.get('orderId')}",
-                'orders': orders,
+                'orders': [limit_order, stop_order],
                 'limitOrder': limit_order,
                 'stopOrder': stop_order
             }
             
         except ValueError as e:
-            logger.error(f"Validation error: {e}")
+            logger.error("Validation error: %s", e)
             return None
         except Exception as e:
-            logger.error(f"OCO order failed: {e}")
-            logger.error(f"Error type: {type(e).__name__}")
+            logger.error("OCO order failed: %s", e)
+            logger.error("Error type: %s", type(e).__name__)
             return None
 
-    def monitor_oco_orders(self, symbol, order_ids):
+    async def _cancel_leg(self, symbol, order_id):
+        """Cancel a leg whose sibling failed to place"""
+        try:
+            await self.client.futures_cancel_order(symbol=symbol, orderId=order_id)
+            logger.warning("Cancelled orphaned OCO leg: %s", order_id)
+        except Exception as e:
+            logger.error("Could not cancel orphaned OCO leg %s: %s", order_id, e)
+
+    async def monitor_oco_orders(self, symbol, order_ids, timeout=MONITOR_TIMEOUT_SECS):
         """Monitor OCO orders and cancel opposite when one executes"""
+        # One event per leg, set once that leg is filled or otherwise closed
+        leg_events = {order_id: asyncio.Event() for order_id in order_ids}
         try:
-            open_orders = self.client.futures_get_open_orders(symbol=symbol)
-            open_order_ids = [order['orderId'] for order in open_orders]
-            
-            executed_orders = []
-            for order_id in order_ids:
-                if order_id not in open_order_ids:
-                    executed_orders.append(order_id)
-            
-            if executed_orders:
-                logger.info(f"Order executed: {executed_orders}")
-                # Cancel remaining orders
-                for order_id in order_ids:
-                    if order_id not in executed_orders and order_id in open_order_ids:
-                        try:
-                            self.client.futures_cancel_order(symbol=symbol, orderId=order_id)
-                            logger.info(f"Cancelled order: {order_id}")
-                        except Exception as e:
-                            logger.warning(f"Could not cancel order {order_id}: {e}")
-            
-            return executed_orders
+            from binance import BinanceSocketManager
+            bsm = BinanceSocketManager(self.client)
+            async with bsm.futures_user_socket() as stream:
+                # A leg may have filled before the stream opened; its update is
+                # gone, so check every leg once now that new ones will be seen
+                filled_id = await self._check_legs(symbol, leg_events)
+                if filled_id is None and not all(e.is_set() for e in leg_events.values()):
+                    filled_id = await asyncio.wait_for(
+                        self._wait_for_fill(stream, symbol, leg_events), timeout
+                    )
+            
+            if filled_id is None:
+                logger.info("All OCO legs closed without a fill: %s", order_ids)
+                return []
+            
+            logger.info("Order executed: %s", filled_id)
+            # Cancel remaining orders
+            for order_id, event in leg_events.items():
+                if not event.is_set():
+                    try:
+                        await self.client.futures_cancel_order(symbol=symbol, orderId=order_id)
+                        logger.info("Cancelled order: %s", order_id)
+                    except Exception as e:
+                        logger.warning("Could not cancel order %s: %s", order_id, e)
             
+            return [filled_id]
+            
+        except asyncio.TimeoutError:
+            logger.info("No OCO leg filled within %ss: %s", timeout, order_ids)
+            return []
         except Exception as e:
-            logger.error(f"Failed to monitor OCO orders: {e}")
+            logger.error("Failed to monitor OCO orders: %s", e)
             return []
 
+    async def _check_legs(self, symbol, leg_events):
+        """Query each leg once; returns a leg that already filled, marking closed ones"""
+        orders = await asyncio.gather(
+            *(self.client.futures_get_order(symbol=symbol, orderId=order_id) for order_id in leg_events)
+        )
+        for (order_id, event), order in zip(leg_events.items(), orders):
+            status = order['status']
+            if status == 'FILLED':
+                event.set()
+                return order_id
+            if status in CLOSED_STATUSES:
+                logger.info("OCO leg %s closed with status %s", order_id, status)
+                event.set()
+        return None
+
+    async def _wait_for_fill(self, stream, symbol, leg_events):
+        """Consume ORDER_TRADE_UPDATE events until a leg fills or every leg closes"""
+        while True:
+            msg = await stream.recv()
+            if msg.get('e') == 'error':
+                raise ConnectionError(f"User data stream error: {msg.get('m')}")
+            if msg.get('e') != 'ORDER_TRADE_UPDATE':
+                continue
+            
+            update = msg['o']
+            event = leg_events.get(update['i'])
+            if event is None or update['s'] != symbol:
+                continue
+            
+            status = update['X']
+            if status == 'FILLED':
+                event.set()
+                return update['i']
+            if status in CLOSED_STATUSES:
+                logger.info("OCO leg %s closed with status %s", update['i'], status)
+                event.set()
+                if all(e.is_set() for e in leg_events.values()):
+                    return None
+
+async def run_oco(args):
+    """Create the bot, place the OCO pair and always release the client"""
+    bot = await OCOOrderBot.create(args.api_key, args.api_secret, args.testnet)
+    try:
+        return await bot.place_oco_order(
+            args.symbol, 
+            args.side, 
+            args.quantity, 
+            args.price,
+            args.stop_price,
+            args.stop_limit_price
+        )
+    finally:
+        await bot.close()
+
 def main():
     """CLI interface for OCO orders"""
     parser = argparse.ArgumentParser(description='Binance Futures OCO Order Bot')
-    parser.add_argument('symbol', help='Trading symbol (e.g., BTCUSDT)')
-    parser.add_argument('side', choices=['BUY', 'SELL'], help='Order side')
+    parser.add_argument('symbol', type=str.upper, help='Trading symbol (e.g., BTCUSDT)')
+    parser.add_argument('side', type=str.upper, choices=['BUY', 'SELL'], help='Order side')
     parser.add_argument('quantity', type=float, help='Order quantity')
     parser.add_argument('price', type=float, help='Limit price (take profit)')
     parser.add_argument('stop_price', type=float, help='Stop trigger price')
@@ -169,22 +278,14 @@ def main():
     parser.add_argument('--api_key', required=True, help='Binance API Key')
     parser.add_argument('--api_secret', required=True, help='Binance API Secret')
     parser.add_argument('--testnet', action='store_true', default=True, help='Use testnet (default: True)')
+    parser.add_argument('--json_logs', action='store_true', help='Write bot.log as JSON lines')
     
     args = parser.parse_args()
+    configure_logging(json_lines=args.json_logs)
     
     try:
-        # Initialize bot
-        bot = OCOOrderBot(args.api_key, args.api_secret, args.testnet)
-        
-        # Place OCO order
-        oco_result = bot.place_oco_order(
-            args.symbol.upper(), 
-            args.side.upper(), 
-            args.quantity, 
-            args.price,
-            args.stop_price,
-            args.stop_limit_price
-        )
+        # Initialize bot and place OCO order
+        oco_result = run(run_oco(args))
         
         if oco_result:
             print(f"✅ OCO order pair placed successfully!")
@@ -199,7 +300,7 @@ def main():
     except KeyboardInterrupt:
         logger.info("OCO order bot terminated by user")
     except Exception as e:
-        logger.error(f"Fatal error in OCO order bot: {e}")
+        logger.error("Fatal error in OCO order bot: %s", e)
         sys.exit(1)
 
 if __name__ == '__main__':
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Ticker Cache for Binance Futures Trading Bot
+Read-through TTL cache in front of futures_symbol_ticker price lookups
+"""
+
+import asyncio
+import time
+
+DEFAULT_MAX_AGE = 0.5  # seconds
+
+class TickerCache:
+    def __init__(self, client, max_age=DEFAULT_MAX_AGE):
+        """Wrap an AsyncClient; prices younger than max_age are served from memory"""
+        self.client = client
+        self.max_age = max_age
+        self._prices = {}   # symbol -> (price, monotonic timestamp)
+        self._pending = {}  # symbol (or None for all symbols) -> in-flight fetch
+
+    def _fresh(self, symbol, max_age):
+        cached = self._prices.get(symbol)
+        if cached and time.monotonic() - cached[1] < max_age:
+            return cached[0]
+        return None
+
+    async def get(self, symbol, max_age=None):
+        """Get the latest price for one symbol, fetching it on a cache miss"""
+        max_age = self.max_age if max_age is None else max_age
+        price = self._fresh(symbol, max_age)
+        if price is None:
+            await self._fetch(symbol)
+            price = self._prices[symbol][0]
+        return price
+
+    async def get_many(self, symbols, max_age=None):
+        """Get prices for several symbols with at most one all-symbols request"""
+        max_age = self.max_age if max_age is None else max_age
+        prices = {symbol: self._fresh(symbol, max_age) for symbol in symbols}
+        if any(price is None for price in prices.values()):
+            await self._fetch(None)
+            prices = {symbol: self._prices[symbol][0] for symbol in symbols}
+        return prices
+
+    async def _fetch(self, symbol):
+        """Collapse concurrent misses for the same key into one HTTP call"""
+        task = self._pending.get(symbol)
+        if task is None:
+            task = asyncio.ensure_future(self._request(symbol))
+            self._pending[symbol] = task
+            task.add_done_callback(lambda _: self._pending.pop(symbol, None))
+        await asyncio.shield(task)
+
+    async def _request(self, symbol):
+        if symbol is None:
+            tickers = await self.client.futures_symbol_ticker()
+        else:
+            tickers = [await self.client.futures_symbol_ticker(symbol=symbol)]
+        now = time.monotonic()
+        for ticker in tickers:
+            self._prices[ticker['symbol']] = (float(ticker['price']), now)
@@ -6,38 +6,105 @@ Splits large orders into smaller chunks over time to minimize market impact
 
 import sys
 import argparse
+import asyncio
+import math
 import time
-import threading
-from datetime import datetime, timedelta
-from binance.client import Client
-from binance.enums import SIDE_BUY, SIDE_SELL, FUTURE_ORDER_TYPE_MARKET, FUTURE_ORDER_TYPE_LIMIT
+from datetime import timedelta
+from ticker_cache import TickerCache
+from _logging import configure_logging
+from _eventloop import run
 import logging
 
-# Configure structured logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s | %(levelname)s | %(module)s | %(message)s',
-    handlers=[
-        logging.FileHandler('bot.log'),
-        logging.StreamHandler()
-    ]
-)
 logger = logging.getLogger('TWAPStrategy')
 
+# Binance accepts at most 5 orders per /fapi/v1/batchOrders request
+MAX_BATCH_ORDERS = 5
+# Below this interval, consecutive chunks are grouped into batch requests
+BATCH_INTERVAL_SECS = 1.0
+# (response header, order limit, window seconds) for USD-M futures order counts
+ORDER_COUNT_LIMITS = (
+    ('X-MBX-ORDER-COUNT-10S', 300, 10),
+    ('X-MBX-ORDER-COUNT-1M', 1200, 60),
+)
+# Fraction of an order-count limit at which placement backs off
+ORDER_COUNT_HEADROOM = 0.9
+
+def _compute_chunks_vectorized(total_quantity, num_orders):
+    """Chunk sizes as one NumPy expression; used when numba is not installed"""
+    base_chunk_size = total_quantity / num_orders
+    
+    # Vary chunk size by ±10% for unpredictability, rounded to 6 decimals
+    variation = base_chunk_size * 0.1 * (0.5 - (np.arange(num_orders) % 10) / 10)
+    chunks = np.round(base_chunk_size + variation, 6)
+    
+    # Clip the running total so chunks never exceed the requested quantity,
+    # then let the last chunk absorb the remainder
+    filled = np.minimum(np.cumsum(chunks[:-1]), total_quantity)
+    chunks[:-1] = np.round(np.diff(filled, prepend=0.0), 6)
+    chunks[-1] = round(total_quantity - chunks[:-1].sum(), 6)
+    return chunks
+
+def _compute_chunks_loop(total_quantity, num_orders):
+    """Same chunk sizes as a scalar loop, which numba compiles to native code"""
+    chunks = np.empty(num_orders)
+    base_chunk_size = total_quantity / num_orders
+    filled = 0.0
+    for i in range(num_orders - 1):
+        chunk_size = round(base_chunk_size + base_chunk_size * 0.1 * (0.5 - (i % 10) / 10), 6)
+        chunk_size = min(chunk_size, round(total_quantity - filled, 6))
+        chunks[i] = chunk_size
+        filled += chunk_size
+    chunks[num_orders - 1] = round(total_quantity - filled, 6)
+    return chunks
+
+np = None
+_compute_chunks = None
+
+def _chunk_kernel():
+    """Pick the chunk sizing kernel on first use so --help never loads numpy or numba"""
+    global np, _compute_chunks
+    if _compute_chunks is None:
+        # Both kernels (and numba, when compiling one) resolve np from module globals
+        import numpy
+        np = numpy
+        try:
+            from numba import njit
+        except ImportError:  # optional: JIT-compiles the chunk sizing kernel
+            _compute_chunks = _compute_chunks_vectorized
+        else:
+            _compute_chunks = njit(cache=True)(_compute_chunks_loop)
+    return _compute_chunks
+
 class TWAPBot:
-    def __init__(self, api_key, api_secret, testnet=True):
-        """Initialize TWAP bot with Binance client"""
+    def __init__(self, client):
+        """Wrap an already-connected AsyncClient; use TWAPBot.create() to build one"""
+        self.client = client
+        self.tickers = TickerCache(client)
+        self.is_running = False
+        self.executed_orders = []
+        self._total_executed = 0.0  # running sum of executedQty, kept in step with executed_orders
+        self._stop_event = asyncio.Event()
+        self._last_price = None  # pushed by the mark price stream during LIMIT TWAPs
+
+    @classmethod
+    async def create(cls, api_key, api_secret, testnet=True):
+        """Initialize TWAP bot with Binance async client"""
+        # Imported here so --help and bad CLI args never pay for loading binance
+        from binance import AsyncClient
         try:
-            self.client = Client(api_key, api_secret, testnet=testnet)
+            client = await AsyncClient.create(api_key, api_secret, testnet=testnet)
             if testnet:
-                self.client.FUTURES_URL = 'https://testnet.binancefuture.com'
-            self.is_running = False
-            self.executed_orders = []
+                client.FUTURES_URL = 'https://testnet.binancefuture.com'
             logger.info("TWAP Strategy Bot initialized successfully")
+            return cls(client)
         except Exception as e:
-            logger.error(f"Failed to initialize bot: {e}")
+            logger.error("Failed to initialize bot: %s", e)
             raise
 
+    async def close(self):
+        """Release the underlying HTTP session"""
+        await self.client.close_connection()
+
     def validate_twap_inputs(self, symbol, side, total_quantity, duration_minutes, interval_seconds):
         """Validate TWAP strategy inputs"""
         if not symbol or len(symbol) < 6:
@@ -63,37 +130,71 @@ class TWAPBot:
         if num_orders < 2:
             raise ValueError("Duration and interval must allow for at least 2 orders")
         
-        logger.info(f"TWAP validation passed: {num_orders} orders over {duration_minutes} minutes")
+        logger.info("TWAP validation passed: %d orders over %s minutes", num_orders, duration_minutes)
         return True
 
     def calculate_twap_chunks(self, total_quantity, duration_minutes, interval_seconds):
         """Calculate order sizes and timing for TWAP execution"""
         num_orders = int((duration_minutes * 60) / interval_seconds)
-        base_chunk_size = total_quantity / num_orders
-        
-        # Add some randomization to avoid predictable patterns
-        chunks = []
-        remaining_quantity = total_quantity
+        chunks = _chunk_kernel()(float(total_quantity), num_orders)
+        chunks = chunks[chunks > 0].tolist()
         
-        for i in range(num_orders - 1):
-            # Vary chunk size by ±10% for unpredictability
-            variation = base_chunk_size * 0.1 * (0.5 - (i % 10) / 10)
-            chunk_size = base_chunk_size + variation
-            chunk_size = min(chunk_size, remaining_quantity)
-            chunk_size = round(chunk_size, 6)  # Round to 6 decimals
-            
-            chunks.append(chunk_size)
-            remaining_quantity -= chunk_size
-        
-        # Add remaining quantity to last chunk
-        if remaining_quantity > 0:
-            chunks.append(round(remaining_quantity, 6))
-        
-        logger.info(f"TWAP chunks calculated: {len(chunks)} orders, sizes: {chunks}")
+        logger.info("TWAP chunks calculated: %d orders, sizes: %s", len(chunks), chunks)
         return chunks
 
-    def execute_twap_strategy(self, symbol, side, total_quantity, duration_minutes, interval_seconds, order_type='MARKET'):
+    async def _price_updater(self, symbol):
+        """Keep the latest mark price from the websocket stream in self._last_price"""
+        from binance import BinanceSocketManager
+        try:
+            bsm = BinanceSocketManager(self.client)
+            async with bsm.symbol_mark_price_socket(symbol) as stream:
+                while True:
+                    msg = await stream.recv()
+                    # Futures market streams arrive wrapped in a combined-stream envelope
+                    data = msg.get('data', msg)
+                    if data.get('e') == 'markPriceUpdate':
+                        self._last_price = float(data['p'])
+        except Exception as e:
+            logger.warning("Mark price stream for %s stopped, falling back to REST: %s", symbol, e)
+        finally:
+            self._last_price = None
+
+    @staticmethod
+    def _batch_size(interval_seconds):
+        """Number of chunks to send per request for the given interval"""
+        if interval_seconds >= BATCH_INTERVAL_SECS:
+            return 1
+        return min(MAX_BATCH_ORDERS, math.ceil(BATCH_INTERVAL_SECS / interval_seconds))
+
+    async def _place_batch(self, orders):
+        """Submit up to MAX_BATCH_ORDERS orders in a single batchOrders request"""
+        # The batch endpoint expects every order parameter as a string
+        batch = [{key: str(value) for key, value in order.items()} for order in orders]
+        return await self.client.futures_place_batch_order(batchOrders=batch)
+
+    def _order_count_backoff(self):
+        """Seconds to pause if the last response shows an order-count limit is nearly used up"""
+        response = getattr(self.client, 'response', None)
+        if response is None:
+            return 0
+        for header, limit, window in ORDER_COUNT_LIMITS:
+            count = response.headers.get(header)
+            if count is not None and int(count) >= limit * ORDER_COUNT_HEADROOM:
+                return window / 10
+        return 0
+
+    async def _wait_or_stop(self, seconds):
+        """Sleep for up to `seconds`, returning early if a stop is requested"""
+        if seconds <= 0:
+            return
+        try:
+            await asyncio.wait_for(self._stop_event.wait(), timeout=seconds)
+        except asyncio.TimeoutError:
+            pass
+
+    async def execute_twap_strategy(self, symbol, side, total_quantity, duration_minutes, interval_seconds, order_type='MARKET'):
         """Execute TWAP strategy with time-weighted order placement"""
+        price_task = None
         try:
             # Validate inputs
             self.validate_twap_inputs(symbol, side, total_quantity, duration_minutes, interval_seconds)
@@ -103,59 +204,88 @@ class TWAPBot:
             
             # Initialize execution tracking
             self.is_running = True
+            self._stop_event.clear()
             self.executed_orders = []
-            start_time = datetime.now()
+            self._total_executed = 0.0
+            # Orders are scheduled against fixed monotonic deadlines so that
+            # order placement latency is absorbed by the wait instead of
+            # accumulating as drift over the TWAP window
+            schedule_start = time.monotonic()
+            
+            logger.info("Starting TWAP execution: %s %s %s over %s min", side, total_quantity, symbol, duration_minutes)
+            
+            if order_type != 'MARKET':
+                # Limit prices come from the pushed mark price instead of a REST call per chunk
+                price_task = asyncio.create_task(self._price_updater(symbol))
             
-            logger.info(f"Starting TWAP execution: {side} {total_quantity} {symbol} over {duration_minutes} min")
+            # Sub-second schedules group chunks into batch requests so the
+            # request rate stays near one per BATCH_INTERVAL_SECS
+            batch_size = self._batch_size(interval_seconds)
+            num_batches = math.ceil(len(chunks) / batch_size)
             
-            for i, chunk_size in enumerate(chunks):
-                if not self.is_running:
+            for b in range(num_batches):
+                if self._stop_event.is_set():
                     logger.info("TWAP execution stopped by user")
                     break
                 
+                first = b * batch_size
+                batch = chunks[first:first + batch_size]
+                
                 try:
-                    # Place individual order
+                    # Build order parameters for every chunk in this batch
                     if order_type == 'MARKET':
-                        order = self.client.futures_create_order(
-                            symbol=symbol,
-                            side=SIDE_BUY if side == 'BUY' else SIDE_SELL,
-                            type=FUTURE_ORDER_TYPE_MARKET,
-                            quantity=chunk_size
-                        )
+                        params = [
+                            {'symbol': symbol, 'side': side, 'type': 'MARKET', 'quantity': chunk_size}
+                            for chunk_size in batch
+                        ]
                     else:  # LIMIT orders at current market price
-                        ticker = self.client.futures_symbol_ticker(symbol=symbol)
-                        current_price = float(ticker['price'])
+                        current_price = self._last_price or await self.tickers.get(symbol)
                         # Slight price adjustment for limit orders
                         limit_price = current_price * (1.001 if side == 'BUY' else 0.999)
-                        
-                        order = self.client.futures_create_order(
-                            symbol=symbol,
-                            side=SIDE_BUY if side == 'BUY' else SIDE_SELL,
-                            type=FUTURE_ORDER_TYPE_LIMIT,
-                            timeInForce='GTC',
-                            quantity=chunk_size,
-                            price=limit_price
-                        )
+                        params = [
+                            {'symbol': symbol, 'side': side, 'type': 'LIMIT', 'timeInForce': 'GTC',
+                             'quantity': chunk_size, 'price': limit_price}
+                            for chunk_size in batch
+                        ]
                     
-                    self.executed_orders.append(order)
-                    executed_qty = order.get('executedQty', chunk_size)
+                    if len(params) == 1:
+                        orders = [await self.client.futures_create_order(**params[0])]
+                    else:
+                        orders = await self._place_batch(params)
                     
-                    logger.info(f"TWAP order {i+1}/{len(chunks)} executed: {executed_qty} {symbol}")
-                    logger.info(f"Order ID: {order.get('orderId')}, Status: {order.get('status')}")
-                    
-                    # Wait for next interval (except for last order)
-                    if i < len(chunks) - 1:
-                        time.sleep(interval_seconds)
+                    for i, (chunk_size, order) in enumerate(zip(batch, orders), start=first):
+                        if 'code' in order:
+                            # Batch responses report per-order rejections inline
+                            logger.error("TWAP order %d failed: %s", i + 1, order.get('msg'))
+                            continue
+                        
+                        self._total_executed += float(order.get('executedQty', 0))
+                        self.executed_orders.append(order)
+                        executed_qty = order.get('executedQty', chunk_size)
+                        
+                        logger.info("TWAP order %d/%d executed: %s %s", i + 1, len(chunks), executed_qty, symbol)
+                        logger.info("Order ID: %s, Status: %s", order.get('orderId'), order.get('status'))
                         
                 except Exception as e:
-                    logger.error(f"TWAP order {i+1} failed: {e}")
-                    continue
+                    logger.error("TWAP order %d failed: %s", first + 1, e)
+                
+                # Back off before the next request if the order-count limit is close
+                backoff = self._order_count_backoff()
+                if backoff:
+                    logger.warning("Approaching order rate limit, pausing %ss", backoff)
+                    await self._wait_or_stop(backoff)
+                
+                # Wait for next interval (except for last order)
+                if b < num_batches - 1:
+                    await self._wait_or_stop(
+                        schedule_start + (first + batch_size) * interval_seconds - time.monotonic()
+                    )
             
             # Calculate execution summary
-            total_executed = sum(float(order.get('executedQty', 0)) for order in self.executed_orders)
-            execution_time = datetime.now() - start_time
+            total_executed = self._total_executed
+            execution_time = timedelta(seconds=time.monotonic() - schedule_start)
             
-            logger.info(f"TWAP execution completed: {total_executed}/{total_quantity} executed in {execution_time}")
+            logger.info("TWAP execution completed: %s/%s executed in %s", total_executed, total_quantity, execution_time)
             
             return {
                 'strategy': 'TWAP',
@@ -167,16 +297,22 @@ class TWAPBot:
             }
             
         except ValueError as e:
-            logger.error(f"Validation error: {e}")
+            logger.error("Validation error: %s", e)
             return None
         except Exception as e:
-            logger.error(f"TWAP strategy failed: {e}")
-            logger.error(f"Error type: {type(e).__name__}")
+            logger.error("TWAP strategy failed: %s", e)
+            logger.error("Error type: %s", type(e).__name__)
             return None
+        finally:
+            self.is_running = False
+            if price_task is not None:
+                price_task.cancel()
+                await asyncio.gather(price_task, return_exceptions=True)
 
     def stop_twap_execution(self):
         """Stop TWAP execution gracefully"""
         self.is_running = False
+        self._stop_event.set()
         logger.info("TWAP execution stop requested")
 
     def get_twap_progress(self):
@@ -184,45 +320,55 @@ class TWAPBot:
         return {
             'is_running': self.is_running,
             'orders_executed': len(self.executed_orders),
-            'total_executed_qty': sum(float(order.get('executedQty', 0)) for order in self.executed_orders)
+            'total_executed_qty': self._total_executed
         }
 
-def main():
-    """CLI interface for TWAP strategy"""
-    parser = argparse.ArgumentParser(description='Binance Futures TWAP Strategy Bot')
-    parser.add_argument('symbol', help='Trading symbol (e.g., BTCUSDT)')
-    parser.add_argument('side', choices=['BUY', 'SELL'], help='Order side')
-    parser.add_argument('total_quantity', type=float, help='Total quantity to execute')
-    parser.add_argument('duration_minutes', type=int, help='Duration in minutes')
-    parser.add_argument('interval_seconds', type=int, help='Interval between orders in seconds')
-    parser.add_argument('--api_key', required=True, help='Binance API Key')
-    parser.add_argument('--api_secret', required=True, help='Binance API Secret')
-    parser.add_argument('--testnet', action='store_true', default=True, help='Use testnet (default: True)')
-    parser.add_argument('--order_type', choices=['MARKET', 'LIMIT'], default='MARKET', help='Order type')
-    
-    args = parser.parse_args()
-    
+async def run_twap(args):
+    """Create the bot, run the TWAP schedule and always release the client"""
+    bot = await TWAPBot.create(args.api_key, args.api_secret, args.testnet)
     try:
-        # Initialize bot
-        bot = TWAPBot(args.api_key, args.api_secret, args.testnet)
-        
         # Execute TWAP strategy
         print(f"🕐 Starting TWAP execution...")
-        print(f"Symbol: {args.symbol.upper()}")
-        print(f"Side: {args.side.upper()}")
+        print(f"Symbol: {args.symbol}")
+        print(f"Side: {args.side}")
         print(f"Total Quantity: {args.total_quantity}")
         print(f"Duration: {args.duration_minutes} minutes")
         print(f"Interval: {args.interval_seconds} seconds")
         print(f"Press Ctrl+C to stop execution\n")
         
-        result = bot.execute_twap_strategy(
-            args.symbol.upper(),
-            args.side.upper(),
+        return await bot.execute_twap_strategy(
+            args.symbol,
+            args.side,
             args.total_quantity,
             args.duration_minutes,
             args.interval_seconds,
             args.order_type
         )
+    except asyncio.CancelledError:
+        bot.stop_twap_execution()
+        raise
+    finally:
+        await bot.close()
+
+def main():
+    """CLI interface for TWAP strategy"""
+    parser = argparse.ArgumentParser(description='Binance Futures TWAP Strategy Bot')
+    parser.add_argument('symbol', type=str.upper, help='Trading symbol (e.g., BTCUSDT)')
+    parser.add_argument('side', type=str.upper, choices=['BUY', 'SELL'], help='Order side')
+    parser.add_argument('total_quantity', type=float, help='Total quantity to execute')
+    parser.add_argument('duration_minutes', type=int, help='Duration in minutes')
+    parser.add_argument('interval_seconds', type=float, help='Interval between orders in seconds (sub-second intervals are batched)')
+    parser.add_argument('--api_key', required=True, help='Binance API Key')
+    parser.add_argument('--api_secret', required=True, help='Binance API Secret')
+    parser.add_argument('--testnet', action='store_true', default=True, help='Use testnet (default: True)')
+    parser.add_argument('--json_logs', action='store_true', help='Write bot.log as JSON lines')
+    parser.add_argument('--order_type', choices=['MARKET', 'LIMIT'], default='MARKET', help='Order type')
+    
+    args = parser.parse_args()
+    configure_logging(json_lines=args.json_logs)
+    
+    try:
+        result = run(run_twap(args))
         
         if result:
             print(f"\n✅ TWAP execution completed!")
@@ -235,11 +381,10 @@ def main():
             sys.exit(1)
             
     except KeyboardInterrupt:
-        bot.stop_twap_execution()
         logger.info("TWAP strategy terminated by user")
         print("\n⏹️  TWAP execution stopped by user")
     except Exception as e:
-        logger.error(f"Fatal error in TWAP strategy: {e}")
+        logger.error("Fatal error in TWAP strategy: %s", e)
         sys.exit(1)
 
 if __name__ == '__main__':
@@ -6,141 +6,424 @@ Handles limit order placement with price validation and logging
 
 import sys
 import argparse
+import asyncio
+import re
+import time
+import weakref
 from datetime import datetime
-from binance.client import Client
-from binance.enums import SIDE_BUY, SIDE_SELL, FUTURE_ORDER_TYPE_LIMIT, TIME_IN_FORCE_GTC
+from functools import lru_cache
+from itertools import islice
+from _client import get_client, close_clients, on_close, order_limiter, BATCH_ORDER_WEIGHT
+from _exchange_info import load_filters, check_filters, to_ticks, format_ticks
+from _core_logging import configure_logging
 import logging
+import orjson
 
-# Configure structured logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s | %(levelname)s | %(module)s | %(message)s',
-    handlers=[
-        logging.FileHandler('bot.log'),
-        logging.StreamHandler()
-    ]
-)
 logger = logging.getLogger('LimitOrders')
 
+# Upper bound on orders in flight at once from a single bot
+MAX_CONCURRENT_ORDERS = 10
+# Binance accepts at most 5 orders per /fapi/v1/batchOrders request
+MAX_BATCH_ORDERS = 5
+
+# Order sides accepted by the CLI
+_VALID_SIDES = frozenset(('BUY', 'SELL'))
+# Fallback symbol shape when exchange info is unavailable: upper-case
+# alphanumerics and '_', e.g. BTCUSDT, 1000000MOGUSDT or BTCUSDT_250328
+_SYMBOL_RE = re.compile(r'^[A-Z0-9_]{5,24}\Z')
+# Limit prices further than this fraction from the market price are flagged
+MAX_PRICE_DEVIATION = 0.1
+# How long a fetched ticker price is reused for validation
+TICKER_TTL_SECS = 1.5
+
+# client -> ({symbol: (monotonic fetch time, price)}, {symbol: in-flight fetch});
+# kept per client so testnet and mainnet prices never mix, and concurrent
+# misses on one client share a single request
+_TICKERS = weakref.WeakKeyDictionary()
+
+async def _get_ticker_price(client, symbol):
+    """Get the market price for symbol, reusing a fetch younger than TICKER_TTL_SECS"""
+    prices, pending = _TICKERS.setdefault(client, ({}, {}))
+    cached = prices.get(symbol)
+    if cached and time.monotonic() - cached[0] < TICKER_TTL_SECS:
+        return cached[1]
+    
+    task = pending.get(symbol)
+    if task is None:
+        task = asyncio.ensure_future(client.futures_symbol_ticker(symbol=symbol))
+        pending[symbol] = task
+        task.add_done_callback(lambda _: pending.pop(symbol, None))
+    ticker = await asyncio.shield(task)
+    
+    price = float(ticker['price'])
+    prices[symbol] = (time.monotonic(), price)
+    return price
+
+def _fmt(obj):
+    """Render an API response as compact JSON for log lines"""
+    return orjson.dumps(obj).decode()
+
+def _batched(items, size):
+    """Yield successive lists of at most size items"""
+    it = iter(items)
+    while batch := list(islice(it, size)):
+        yield batch
+
 class LimitOrderBot:
-    def __init__(self, api_key, api_secret, testnet=True):
-        """Initialize limit order bot with Binance client"""
+    def __init__(self, client, filters=None):
+        """Wrap an already-connected AsyncClient; use LimitOrderBot.create() to build one"""
+        self.client = client
+        self._filters = filters or {}  # symbol -> exchange filters, see _exchange_info
+        self._order_slots = asyncio.Semaphore(MAX_CONCURRENT_ORDERS)
+        self._bucket = order_limiter(client)
+        self._last_price = {}     # symbol -> mid price pushed by the book ticker stream
+        self._price_streams = {}  # symbol -> background stream task
+        self._seen_symbols = set()  # symbols with at least one validated order
+
+    @classmethod
+    async def create(cls, api_key, api_secret, testnet=True):
+        """Initialize limit order bot with the shared Binance async client"""
         try:
-            self.client = Client(api_key, api_secret, testnet=testnet)
-            if testnet:
-                self.client.FUTURES_URL = 'https://testnet.binancefuture.com'
+            client = await get_client(api_key, api_secret, testnet)
+            filters = await load_filters(client)
             logger.info("Limit Order Bot initialized successfully")
+            return cls(client, filters)
         except Exception as e:
-            logger.error(f"Failed to initialize bot: {e}")
+            logger.error("Failed to initialize bot: %s", e)
             raise
 
-    def validate_inputs(self, symbol, side, quantity, price):
-        """Validate order inputs including price thresholds"""
-        if not symbol or len(symbol) < 6:
-            raise ValueError("Invalid symbol format")
-        
-        if side not in ['BUY', 'SELL']:
-            raise ValueError("Side must be BUY or SELL")
+    async def close(self):
+        """Stop price streams; the shared client is released by close_clients()"""
+        for task in self._price_streams.values():
+            task.cancel()
+        await asyncio.gather(*self._price_streams.values(), return_exceptions=True)
+        self._price_streams.clear()
+
+    def _track_symbol(self, symbol):
+        """Stream symbol's book ticker once a second order for it passes validation"""
+        # A one-shot order validates before the first tick could arrive, so the
+        # websocket only pays off for bots placing repeat orders on a symbol
+        if symbol in self._price_streams:
+            return
+        if symbol in self._seen_symbols:
+            self._price_streams[symbol] = asyncio.create_task(self._stream_book_ticker(symbol))
+        else:
+            self._seen_symbols.add(symbol)
+
+    async def _stream_book_ticker(self, symbol):
+        """Keep self._last_price[symbol] at the best bid/ask mid from the websocket"""
+        from binance import BinanceSocketManager
+        try:
+            bsm = BinanceSocketManager(self.client)
+            async with bsm.symbol_ticker_futures_socket(symbol) as stream:
+                while True:
+                    self._on_tick(symbol, await stream.recv())
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning("Book ticker stream for %s stopped, falling back to REST: %s", symbol, e)
+            # Drop the stale price and allow a later order to resubscribe
+            self._last_price.pop(symbol, None)
+            self._price_streams.pop(symbol, None)
+
+    def _on_tick(self, symbol, msg):
+        """Record the mid price from a book ticker message"""
+        # Futures market streams arrive wrapped in a combined-stream envelope
+        data = msg.get('data', msg)
+        if 'b' in data and 'a' in data:
+            self._last_price[symbol] = (float(data['b']) + float(data['a'])) / 2
+
+    def _check_order(self, symbol, side, quantity, price):
+        """Check order inputs without any I/O; raises ValueError on bad input"""
+        # The exchange's symbol list is authoritative once loaded; the regex
+        # only stands in for it when exchange info could not be fetched
+        symbol_ok = symbol in self._filters if self._filters else _SYMBOL_RE.match(symbol)
         
-        if quantity <= 0:
-            raise ValueError("Quantity must be positive")
-            
-        if price <= 0:
+        # One short-circuit guard on the hot path; only a failure pays for
+        # working out which check to report
+        if not symbol_ok or side not in _VALID_SIDES or quantity <= 0 or price <= 0:
+            if not symbol_ok:
+                raise ValueError(f"Unknown symbol: {symbol}" if self._filters else "Invalid symbol format")
+            if side not in _VALID_SIDES:
+                raise ValueError("Side must be BUY or SELL")
+            if quantity <= 0:
+                raise ValueError("Quantity must be positive")
             raise ValueError("Price must be positive")
         
+        # With exchange info loaded, tick size, lot size and min notional are
+        # checked locally
+        symbol_filters = self._filters.get(symbol)
+        if symbol_filters:
+            check_filters(symbol_filters, quantity, price)
+
+    def _price_param(self, symbol, price):
+        """Price as sent to the API: printed at tick precision when filters are known"""
+        symbol_filters = self._filters.get(symbol)
+        if symbol_filters:
+            return format_ticks(symbol_filters, to_ticks(symbol_filters, price))
+        return str(price)
+
+    async def _market_price(self, symbol):
+        """Latest streamed price for symbol, falling back to the REST ticker"""
+        current_price = self._last_price.get(symbol)
+        if current_price is None:
+            current_price = await _get_ticker_price(self.client, symbol)
+        return current_price
+
+    async def validate_inputs(self, symbol, side, quantity, price):
+        """Validate order inputs including price thresholds"""
+        self._check_order(symbol, side, quantity, price)
+        
         # Get current market price for validation
         try:
-            ticker = self.client.futures_symbol_ticker(symbol=symbol)
-            current_price = float(ticker['price'])
-            price_deviation = abs(price - current_price) / current_price
+            current_price = await self._market_price(symbol)
+            symbol_filters = self._filters.get(symbol)
+            if symbol_filters:
+                # Compare whole tick counts so the distance from market is exact
+                price_ticks = to_ticks(symbol_filters, price)
+                market_ticks = to_ticks(symbol_filters, current_price)
+                price_deviation = abs(price_ticks - market_ticks) / market_ticks
+            else:
+                price_deviation = abs(price - current_price) / current_price
             
             # Log price analysis
-            logger.info(f"Current market price for {symbol}: {current_price}")
-            logger.info(f"Limit price: {price}, Deviation: {price_deviation:.2%}")
+            logger.info("Current market price for %s: %s", symbol, current_price)
+            logger.info("Limit price: %s, Deviation: %.2f%%", price, price_deviation * 100)
             
             # Warn if price is significantly different from market
-            if price_deviation > 0.1:  # 10% deviation
-                logger.warning(f"Limit price deviates {price_deviation:.2%} from market price")
+            if price_deviation > MAX_PRICE_DEVIATION:
+                logger.warning("Limit price deviates %.2f%% from market price", price_deviation * 100)
                 
         except Exception as e:
-            logger.warning(f"Could not fetch current price for validation: {e}")
+            logger.warning("Could not fetch current price for validation: %s", e)
         
-        logger.info(f"Input validation passed: {symbol} {side} {quantity} @ {price}")
+        logger.info("Input validation passed: %s %s %s @ %s", symbol, side, quantity, price)
         return True
 
-    def place_limit_order(self, symbol, side, quantity, price):
+    async def validate_grid(self, symbol, prices, quantities):
+        """Check a grid of limit orders for one symbol against one market price fetch
+
+        Returns the indices of prices deviating more than MAX_PRICE_DEVIATION
+        """
+        # Only batch callers need numpy, so single-order runs never load it
+        import numpy as np
+        
+        prices = np.asarray(prices, dtype=float)
+        quantities = np.asarray(quantities, dtype=float)
+        if prices.size != quantities.size:
+            raise ValueError("Grid needs one quantity per price")
+        if prices.size == 0:
+            return np.empty(0, dtype=np.intp)
+        if (prices <= 0).any() or (quantities <= 0).any():
+            raise ValueError("Grid prices and quantities must be positive")
+        
+        try:
+            current_price = await self._market_price(symbol)
+        except Exception as e:
+            logger.warning("Could not fetch current price for validation: %s", e)
+            return np.empty(0, dtype=np.intp)
+        
+        # One vectorized pass over the whole grid instead of a log line per order
+        deviation = np.abs(prices - current_price) / current_price
+        outliers = np.flatnonzero(deviation > MAX_PRICE_DEVIATION)
+        logger.info("Grid of %d %s orders vs market price %s: max deviation %.2f%%",
+                    prices.size, symbol, current_price, deviation.max() * 100)
+        if outliers.size:
+            logger.warning("%d of %d grid prices deviate more than %.0f%% from market price",
+                           outliers.size, prices.size, MAX_PRICE_DEVIATION * 100)
+        return outliers
+
+    async def place_limit_order(self, symbol, side, quantity, price):
         """Place a limit order with validation and logging"""
         try:
             # Validate inputs
-            self.validate_inputs(symbol, side, quantity, price)
+            await self.validate_inputs(symbol, side, quantity, price)
+            self._track_symbol(symbol)
             
             # Log order attempt
-            logger.info(f"Attempting limit order: {side} {quantity} {symbol} @ {price}")
+            logger.info("Attempting limit order: %s %s %s @ %s", side, quantity, symbol, price)
             
             # Place order
-            order = self.client.futures_create_order(
-                symbol=symbol,
-                side=SIDE_BUY if side == 'BUY' else SIDE_SELL,
-                type=FUTURE_ORDER_TYPE_LIMIT,
-                timeInForce=TIME_IN_FORCE_GTC,
-                quantity=quantity,
-                price=price
-            )
+            await self._bucket.acquire()
+            async with self._order_slots:
+                order = await self.client.futures_create_order(
+                    symbol=symbol,
+                    side=side,
+                    type='LIMIT',
+                    timeInForce='GTC',
+                    quantity=quantity,
+                    price=self._price_param(symbol, price)
+                )
             
             # Log successful execution
-            logger.info(f"Limit order placed successfully: Order ID {order.get('orderId')}")
-            logger.info(f"Order details: {order}")
+            logger.info("Limit order placed successfully: Order ID %s", order.get('orderId'))
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Order details: %s", _fmt(order))
             
             return order
             
         except ValueError as e:
-            logger.error(f"Validation error: {e}")
+            logger.error("Validation error: %s", e)
             return None
         except Exception as e:
-            logger.error(f"Limit order failed: {e}")
-            logger.error(f"Error type: {type(e).__name__}")
+            logger.error("Limit order failed: %s", e)
+            logger.error("Error type: %s", type(e).__name__)
             return None
 
-    def get_open_orders(self, symbol=None):
+    async def place_many(self, orders):
+        """Place several limit orders concurrently; orders are dicts of place_limit_order kwargs"""
+        return await asyncio.gather(*(self.place_limit_order(**order) for order in orders))
+
+    async def place_batch_orders(self, orders):
+        """Place limit orders via batchOrders, up to MAX_BATCH_ORDERS per signed request"""
+        try:
+            # Validate every order once before anything is sent, with one
+            # market price check per symbol
+            by_symbol = {}
+            for order in orders:
+                self._check_order(**order)
+                by_symbol.setdefault(order['symbol'], []).append(order)
+            await asyncio.gather(*(
+                self.validate_grid(symbol, [o['price'] for o in group], [o['quantity'] for o in group])
+                for symbol, group in by_symbol.items()
+            ))
+            for order in orders:
+                self._track_symbol(order['symbol'])
+        except ValueError as e:
+            logger.error("Validation error: %s", e)
+            return None
+        
+        # The batch endpoint expects every order parameter as a string
+        params = [
+            {
+                'symbol': order['symbol'],
+                'side': order['side'],
+                'type': 'LIMIT',
+                'quantity': str(order['quantity']),
+                'price': self._price_param(order['symbol'], order['price']),
+                'timeInForce': 'GTC'
+            }
+            for order in orders
+        ]
+        
+        results = await asyncio.gather(
+            *(self._submit_batch(batch) for batch in _batched(params, MAX_BATCH_ORDERS))
+        )
+        return [order for batch in results for order in batch]
+
+    async def _submit_batch(self, batch):
+        """Send one batchOrders request; failed requests yield None per order"""
+        try:
+            await self._bucket.acquire(BATCH_ORDER_WEIGHT)
+            async with self._order_slots:
+                response = await self.client.futures_place_batch_order(batchOrders=batch)
+        except Exception as e:
+            logger.error("Batch order request failed: %s", e)
+            return [None] * len(batch)
+        
+        for order in response:
+            # Per-order rejections come back inline as error objects
+            if 'code' in order:
+                logger.error("Batch order rejected: %s", order.get('msg'))
+            else:
+                logger.info("Limit order placed successfully: Order ID %s", order.get('orderId'))
+        return response
+
+    async def get_open_orders(self, symbol=None):
         """Get open orders for monitoring"""
         try:
-            orders = self.client.futures_get_open_orders(symbol=symbol)
-            logger.info(f"Retrieved {len(orders)} open orders")
+            orders = await self.client.futures_get_open_orders(symbol=symbol)
+            logger.info("Retrieved %s open orders", len(orders))
             return orders
         except Exception as e:
-            logger.error(f"Failed to get open orders: {e}")
+            logger.error("Failed to get open orders: %s", e)
             return []
 
-    def cancel_order(self, symbol, order_id):
+    async def cancel_order(self, symbol, order_id):
         """Cancel a specific order"""
         try:
-            result = self.client.futures_cancel_order(symbol=symbol, orderId=order_id)
-            logger.info(f"Order {order_id} cancelled successfully")
+            await self._bucket.acquire()
+            result = await self.client.futures_cancel_order(symbol=symbol, orderId=order_id)
+            logger.info("Order %s cancelled successfully", order_id)
             return result
         except Exception as e:
-            logger.error(f"Failed to cancel order {order_id}: {e}")
+            logger.error("Failed to cancel order %s: %s", order_id, e)
             return None
 
-def main():
-    """CLI interface for limit orders"""
+async def execute(bot, args):
+    """Place the limit order described by parsed CLI args on an existing bot"""
+    # Place limit order
+    order = await bot.place_limit_order(args.symbol, args.side, args.quantity, args.price)
+    
+    # Check open orders if requested
+    open_orders = None
+    if order and args.check_orders:
+        open_orders = await bot.get_open_orders(args.symbol)
+    return order, open_orders
+
+async def run_limit_order(args):
+    """Create the bot, place the limit order and always release the client"""
+    bot = await LimitOrderBot.create(args.api_key, args.api_secret, args.testnet)
+    try:
+        return await execute(bot, args)
+    finally:
+        await bot.close()
+        await close_clients()
+
+# client -> bot reused by place_limit() across calls; the bot holds its client, so
+# entries (and the clients) live until close_clients() releases them
+_BOTS = {}
+
+async def _shared_bot(client):
+    """Return the LimitOrderBot for client, building it on first use"""
+    bot = _BOTS.get(client)
+    if bot is None:
+        filters = await load_filters(client)
+        bot = _BOTS.get(client)
+        if bot is None:
+            bot = _BOTS[client] = LimitOrderBot(client, filters)
+            on_close(client, lambda: _release_bot(client))
+    return bot
+
+async def _release_bot(client):
+    bot = _BOTS.pop(client, None)
+    if bot is not None:
+        await bot.close()
+
+async def place_limit(symbol, side, quantity, price, *, client=None, api_key=None, api_secret=None, testnet=True):
+    """Place one limit order in-process; pass client to reuse an existing connection
+
+    Calls on one client share a bot, and with it the concurrency cap; the bot, and
+    with it the client (caller-built or from api_key/api_secret), is held until
+    close_clients()
+    """
+    if client is None:
+        client = await get_client(api_key, api_secret, testnet)
+    bot = await _shared_bot(client)
+    return await bot.place_limit_order(symbol, side, quantity, price)
+
+@lru_cache(maxsize=1)
+def _build_parser():
+    """Build the CLI parser once per process"""
     parser = argparse.ArgumentParser(description='Binance Futures Limit Order Bot')
-    parser.add_argument('symbol', help='Trading symbol (e.g., BTCUSDT)')
-    parser.add_argument('side', choices=['BUY', 'SELL'], help='Order side')
+    parser.add_argument('symbol', type=str.upper, help='Trading symbol (e.g., BTCUSDT)')
+    parser.add_argument('side', type=str.upper, choices=['BUY', 'SELL'], help='Order side')
     parser.add_argument('quantity', type=float, help='Order quantity')
     parser.add_argument('price', type=float, help='Limit price')
     parser.add_argument('--api_key', required=True, help='Binance API Key')
     parser.add_argument('--api_secret', required=True, help='Binance API Secret')
     parser.add_argument('--testnet', action='store_true', default=True, help='Use testnet (default: True)')
     parser.add_argument('--check_orders', action='store_true', help='Check open orders after placement')
-    
-    args = parser.parse_args()
+    return parser
+
+def run_cli(argv=None):
+    """CLI interface for limit orders; argv defaults to sys.argv[1:]"""
+    args = _build_parser().parse_args(argv)
+    configure_logging()
     
     try:
-        # Initialize bot
-        bot = LimitOrderBot(args.api_key, args.api_secret, args.testnet)
-        
-        # Place limit order
-        order = bot.place_limit_order(args.symbol.upper(), args.side.upper(), args.quantity, args.price)
+        # Initialize bot and place limit order
+        order, open_orders = asyncio.run(run_limit_order(args))
         
         if order:
             print(f"✅ Limit order placed successfully!")
@@ -152,9 +435,8 @@ def main():
             print(f"Price: {order.get('price')}")
             
             # Check open orders if requested
-            if args.check_orders:
-                open_orders = bot.get_open_orders(args.symbol.upper())
-                print(f"\n📋 Open orders for {args.symbol.upper()}: {len(open_orders)}")
+            if open_orders is not None:
+                print(f"\n📋 Open orders for {args.symbol}: {len(open_orders)}")
         else:
             print("❌ Limit order failed. Check logs for details.")
             sys.exit(1)
@@ -162,8 +444,12 @@ def main():
     except KeyboardInterrupt:
         logger.info("Limit order bot terminated by user")
     except Exception as e:
-        logger.error(f"Fatal error in limit order bot: {e}")
+        logger.error("Fatal error in limit order bot: %s", e)
         sys.exit(1)
 
+def main():
+    """Console entry point"""
+    run_cli()
+
 if __name__ == '__main__':
     main()
\ No newline at end of file
@@ -6,113 +6,250 @@ Handles market order placement with validation and logging
 
 import sys
 import argparse
+import asyncio
+import re
 from datetime import datetime
-from binance.client import Client
-from binance.enums import SIDE_BUY, SIDE_SELL, FUTURE_ORDER_TYPE_MARKET
+from functools import lru_cache
+from itertools import islice
+from _client import get_client, close_clients, on_close, order_limiter, BATCH_ORDER_WEIGHT
+from _exchange_info import load_filters, check_filters
+from _core_logging import configure_logging
 import logging
+import orjson
 
-# Configure structured logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s | %(levelname)s | %(module)s | %(message)s',
-    handlers=[
-        logging.FileHandler('bot.log'),
-        logging.StreamHandler()
-    ]
-)
 logger = logging.getLogger('MarketOrders')
 
+# Upper bound on orders in flight at once from a single bot
+MAX_CONCURRENT_ORDERS = 10
+# Binance accepts at most 5 orders per /fapi/v1/batchOrders request
+MAX_BATCH_ORDERS = 5
+
+# Order sides accepted by the CLI
+_VALID_SIDES = frozenset(('BUY', 'SELL'))
+# Fallback symbol shape when exchange info is unavailable: upper-case
+# alphanumerics and '_', e.g. BTCUSDT, 1000000MOGUSDT or BTCUSDT_250328
+_SYMBOL_RE = re.compile(r'^[A-Z0-9_]{5,24}\Z')
+
+def _fmt(obj):
+    """Render an API response as compact JSON for log lines"""
+    return orjson.dumps(obj).decode()
+
+def _batched(items, size):
+    """Yield successive lists of at most size items"""
+    it = iter(items)
+    while batch := list(islice(it, size)):
+        yield batch
+
 class MarketOrderBot:
-    def __init__(self, api_key, api_secret, testnet=True):
-        """Initialize market order bot with Binance client"""
+    def __init__(self, client, filters=None):
+        """Wrap an already-connected AsyncClient; use MarketOrderBot.create() to build one"""
+        self.client = client
+        self._filters = filters or {}  # symbol -> exchange filters, see _exchange_info
+        self._order_slots = asyncio.Semaphore(MAX_CONCURRENT_ORDERS)
+        self._bucket = order_limiter(client)
+
+    @classmethod
+    async def create(cls, api_key, api_secret, testnet=True):
+        """Initialize market order bot with the shared Binance async client"""
         try:
-            self.client = Client(api_key, api_secret, testnet=testnet)
-            if testnet:
-                self.client.FUTURES_URL = 'https://testnet.binancefuture.com'
+            client = await get_client(api_key, api_secret, testnet)
+            filters = await load_filters(client)
             logger.info("Market Order Bot initialized successfully")
+            return cls(client, filters)
         except Exception as e:
-            logger.error(f"Failed to initialize bot: {e}")
+            logger.error("Failed to initialize bot: %s", e)
             raise
 
+    async def close(self):
+        """Nothing bot-specific to release; the shared client is released by close_clients()"""
+
     def validate_inputs(self, symbol, side, quantity):
         """Validate order inputs"""
-        if not symbol or len(symbol) < 6:
-            raise ValueError("Invalid symbol format")
-        
-        if side not in ['BUY', 'SELL']:
-            raise ValueError("Side must be BUY or SELL")
+        # The exchange's symbol list is authoritative once loaded; the regex
+        # only stands in for it when exchange info could not be fetched
+        symbol_ok = symbol in self._filters if self._filters else _SYMBOL_RE.match(symbol)
         
-        if quantity <= 0:
+        # One short-circuit guard on the hot path; only a failure pays for
+        # working out which check to report
+        if not symbol_ok or side not in _VALID_SIDES or quantity <= 0:
+            if not symbol_ok:
+                raise ValueError(f"Unknown symbol: {symbol}" if self._filters else "Invalid symbol format")
+            if side not in _VALID_SIDES:
+                raise ValueError("Side must be BUY or SELL")
             raise ValueError("Quantity must be positive")
         
-        logger.info(f"Input validation passed: {symbol} {side} {quantity}")
+        # With exchange info loaded, lot size is checked locally
+        symbol_filters = self._filters.get(symbol)
+        if symbol_filters:
+            check_filters(symbol_filters, quantity)
+        
+        logger.info("Input validation passed: %s %s %s", symbol, side, quantity)
         return True
 
-    def place_market_order(self, symbol, side, quantity):
+    async def place_market_order(self, symbol, side, quantity):
         """Place a market order with validation and logging"""
         try:
             # Validate inputs
             self.validate_inputs(symbol, side, quantity)
             
             # Log order attempt
-            logger.info(f"Attempting market order: {side} {quantity} {symbol}")
+            logger.info("Attempting market order: %s %s %s", side, quantity, symbol)
             
             # Place order
-            order = self.client.futures_create_order(
-                symbol=symbol,
-                side=SIDE_BUY if side == 'BUY' else SIDE_SELL,
-                type=FUTURE_ORDER_TYPE_MARKET,
-                quantity=quantity
-            )
+            await self._bucket.acquire()
+            async with self._order_slots:
+                order = await self.client.futures_create_order(
+                    symbol=symbol,
+                    side=side,
+                    type='MARKET',
+                    quantity=quantity
+                )
             
             # Log successful execution
-            logger.info(f"Market order executed successfully: Order ID {order.get('orderId')}")
-            logger.info(f"Order details: {order}")
+            logger.info("Market order executed successfully: Order ID %s", order.get('orderId'))
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Order details: %s", _fmt(order))
             
             return order
             
         except ValueError as e:
-            logger.error(f"Validation error: {e}")
+            logger.error("Validation error: %s", e)
             return None
         except Exception as e:
-            logger.error(f"Market order failed: {e}")
-            logger.error(f"Error type: {type(e).__name__}")
+            logger.error("Market order failed: %s", e)
+            logger.error("Error type: %s", type(e).__name__)
+            return None
+
+    async def place_many(self, orders):
+        """Place several market orders concurrently; orders are dicts of place_market_order kwargs"""
+        return await asyncio.gather(*(self.place_market_order(**order) for order in orders))
+
+    async def place_batch_orders(self, orders):
+        """Place market orders via batchOrders, up to MAX_BATCH_ORDERS per signed request"""
+        try:
+            # Validate every order once before anything is sent
+            for order in orders:
+                self.validate_inputs(**order)
+        except ValueError as e:
+            logger.error("Validation error: %s", e)
             return None
+        
+        # The batch endpoint expects every order parameter as a string
+        params = [
+            {
+                'symbol': order['symbol'],
+                'side': order['side'],
+                'type': 'MARKET',
+                'quantity': str(order['quantity'])
+            }
+            for order in orders
+        ]
+        
+        results = await asyncio.gather(
+            *(self._submit_batch(batch) for batch in _batched(params, MAX_BATCH_ORDERS))
+        )
+        return [order for batch in results for order in batch]
 
-    def get_account_balance(self):
+    async def _submit_batch(self, batch):
+        """Send one batchOrders request; failed requests yield None per order"""
+        try:
+            await self._bucket.acquire(BATCH_ORDER_WEIGHT)
+            async with self._order_slots:
+                response = await self.client.futures_place_batch_order(batchOrders=batch)
+        except Exception as e:
+            logger.error("Batch order request failed: %s", e)
+            return [None] * len(batch)
+        
+        for order in response:
+            # Per-order rejections come back inline as error objects
+            if 'code' in order:
+                logger.error("Batch order rejected: %s", order.get('msg'))
+            else:
+                logger.info("Market order executed successfully: Order ID %s", order.get('orderId'))
+        return response
+
+    async def get_account_balance(self):
         """Get account balance for validation"""
         try:
-            account = self.client.futures_account()
+            account = await self.client.futures_account()
             balance = account.get('totalWalletBalance', '0')
-            logger.info(f"Account balance retrieved: {balance} USDT")
+            logger.info("Account balance retrieved: %s USDT", balance)
             return float(balance)
         except Exception as e:
-            logger.error(f"Failed to get account balance: {e}")
+            logger.error("Failed to get account balance: %s", e)
             return 0.0
 
-def main():
-    """CLI interface for market orders"""
+async def execute(bot, args):
+    """Check balance and place the market order described by parsed CLI args on an existing bot"""
+    # Check account balance
+    balance = await bot.get_account_balance()
+    if balance <= 0:
+        logger.warning("Account balance is zero or unavailable")
+    
+    # Place market order
+    return await bot.place_market_order(args.symbol, args.side, args.quantity)
+
+async def run_market_order(args):
+    """Create the bot, check balance, place the market order and always release the client"""
+    bot = await MarketOrderBot.create(args.api_key, args.api_secret, args.testnet)
+    try:
+        return await execute(bot, args)
+    finally:
+        await bot.close()
+        await close_clients()
+
+# client -> bot reused by place_market() across calls; the bot holds its client, so
+# entries (and the clients) live until close_clients() releases them
+_BOTS = {}
+
+async def _shared_bot(client):
+    """Return the MarketOrderBot for client, building it on first use"""
+    bot = _BOTS.get(client)
+    if bot is None:
+        filters = await load_filters(client)
+        bot = _BOTS.get(client)
+        if bot is None:
+            bot = _BOTS[client] = MarketOrderBot(client, filters)
+            on_close(client, lambda: _release_bot(client))
+    return bot
+
+async def _release_bot(client):
+    bot = _BOTS.pop(client, None)
+    if bot is not None:
+        await bot.close()
+
+async def place_market(symbol, side, quantity, *, client=None, api_key=None, api_secret=None, testnet=True):
+    """Place one market order in-process; pass client to reuse an existing connection
+
+    Calls on one client share a bot, and with it the concurrency cap; the bot, and
+    with it the client (caller-built or from api_key/api_secret), is held until
+    close_clients()
+    """
+    if client is None:
+        client = await get_client(api_key, api_secret, testnet)
+    bot = await _shared_bot(client)
+    return await bot.place_market_order(symbol, side, quantity)
+
+@lru_cache(maxsize=1)
+def _build_parser():
+    """Build the CLI parser once per process"""
     parser = argparse.ArgumentParser(description='Binance Futures Market Order Bot')
-    parser.add_argument('symbol', help='Trading symbol (e.g., BTCUSDT)')
-    parser.add_argument('side', choices=['BUY', 'SELL'], help='Order side')
+    parser.add_argument('symbol', type=str.upper, help='Trading symbol (e.g., BTCUSDT)')
+    parser.add_argument('side', type=str.upper, choices=['BUY', 'SELL'], help='Order side')
     parser.add_argument('quantity', type=float, help='Order quantity')
     parser.add_argument('--api_key', required=True, help='Binance API Key')
     parser.add_argument('--api_secret', required=True, help='Binance API Secret')
     parser.add_argument('--testnet', action='store_true', default=True, help='Use testnet (default: True)')
-    
-    args = parser.parse_args()
+    return parser
+
+def run_cli(argv=None):
+    """CLI interface for market orders; argv defaults to sys.argv[1:]"""
+    args = _build_parser().parse_args(argv)
+    configure_logging()
     
     try:
-        # Initialize bot
-        bot = MarketOrderBot(args.api_key, args.api_secret, args.testnet)
-        
-        # Check account balance
-        balance = bot.get_account_balance()
-        if balance <= 0:
-            logger.warning("Account balance is zero or unavailable")
-        
-        # Place market order
-        order = bot.place_market_order(args.symbol.upper(), args.side.upper(), args.quantity)
+        # Initialize bot and place market order
+        order = asyncio.run(run_market_order(args))
         
         if order:
             print(f"✅ Market order placed successfully!")
@@ -126,8 +263,12 @@ def main():
     except KeyboardInterrupt:
         logger.info("Market order bot terminated by user")
     except Exception as e:
-        logger.error(f"Fatal error in market order bot: {e}")
+        logger.error("Fatal error in market order bot: %s", e)
         sys.exit(1)
 
+def main():
+    """Console entry point"""
+    run_cli()
+
 if __name__ == '__main__':
     main()
\ No newline at end of file